@@ -0,0 +1,109 @@
+"""
+Peak memory of `GiTree.gets` against a synthetic repository.
+
+Every configuration runs in its own process, so that the reported peak RSS
+(`resource.getrusage`) belongs to it alone. The network is stubbed:
+`_capture` lists `--per-dir` files per directory and `_download` returns the
+file path as content. In tree output `_write_file` is stubbed as well,
+so nothing but the metadata and the index reach the disk.
+
+Usage:
+    python benchmarks/memory.py [--entries 20000] [--per-dir 100]
+
+Unix only (`resource`).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+MODES = {
+    "normal/tree"    : {},
+    "low_memory/tree": {"low_memory": True},
+    "low_memory/pack": {"low_memory": True, "output": "pack"},
+}
+
+
+def _run(entries: int, per_dir: int, kwargs: dict) -> None:
+    import contextlib
+
+    from gitree import GiTree, GiTreePack
+
+    class _Response:
+        status_code = 200
+
+        def __init__(self, content: bytes):
+            self.content = content
+
+        def iter_content(self, chunk_size):
+            yield self.content
+
+    class _Stubbed(GiTree):
+        def _capture(self, url: str = ""):
+            # 根目录列出子目录, 子目录 `dir:<i>` 列出文件
+            if not url:
+                return [
+                    {
+                        "name": f"d{i}", "path": f"d{i}", "html_url": "",
+                        "url": f"dir:{i}", "download_url": None,
+                        "type": "dir", "sha": "", "size": 0
+                    }
+                    for i in range(entries // per_dir)
+                ]
+            i = url.split(":")[1]
+            return [
+                {
+                    "name": f"f{j}", "path": f"d{i}/f{j}", "html_url": "",
+                    "url": "", "download_url": f"raw:d{i}/f{j}", "type": "file",
+                    "sha": GiTreePack.hash_object(f"d{i}/f{j}".encode()), "size": 0
+                }
+                for j in range(per_dir)
+            ]
+
+        def _download(self, url: str):
+            return _Response(url[len("raw:"):].encode())
+
+        def _write_file(self, path: str, url: str, save_to: str) -> bool:
+            return True
+
+    with tempfile.TemporaryDirectory() as save_path, \
+            open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        _Stubbed("bench", "repo", save_path=save_path, **kwargs).gets()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KiB 为单位, macOS 以字节为单位
+    print(peak * 1024 if sys.platform != "darwin" else peak)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--per-dir", type=int, default=100)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _run(args.entries, args.per_dir, json.loads(args.child))
+        return
+
+    print(f"{'mode':<18}{'entries':>10}{'peak RSS (MB)':>16}")
+    for name, kwargs in MODES.items():
+        for entries in (args.entries, args.entries * 10):
+            peak = subprocess.run(
+                [
+                    sys.executable, __file__,
+                    "--entries", str(entries),
+                    "--per-dir", str(args.per_dir),
+                    "--child", json.dumps(kwargs)
+                ],
+                check=True,
+                capture_output=True,
+                text=True
+            ).stdout.split()[-1]
+            print(f"{name:<18}{entries:>10}{int(peak) / 2 ** 20:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
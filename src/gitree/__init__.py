@@ -9,3 +9,4 @@ __author__  = "星灿长风v(StarWindv)"
 __email__   = "starwindv.stv@gmail.com"
 
 from .modern import GiTree
+from .pack import GiTreePack
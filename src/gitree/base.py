@@ -9,6 +9,8 @@ class _Connect:
     which defined some base url for GitHub.
     """
     _BASE_URL   = "https://api.github.com/repos/;owner;/;repo;/contents?ref=;branch;"
+    _CONTENTS_URL = "https://api.github.com/repos/;owner;/;repo;/contents/;path;?ref=;branch;"
+    _GRAPHQL_URL = "https://api.github.com/graphql"
     _RAW_UEL    = "https://raw.githubusercontent.com/;owner;/;repo;/;branch;/;path;"
     _DOMAIN_URL = "https://github.com"
     _WEB_URL    = "https://github.com/;owner;/;repo;/tree/;branch;"
@@ -0,0 +1,79 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class _FileLock:
+    """
+    This is a cross-process lock on a file,
+    which is used as a context manager, or through `acquire`/`release`,
+    and blocks until acquired.
+
+    Each acquisition opens its own descriptor,
+    so threads of one process exclude each other too.
+    """
+    def __init__(self, path: str, shared: bool = False):
+        """
+        Args:
+            path (str):
+                The lock file, created with its directory when missing.
+            shared (bool):
+                default: False
+                Take a shared lock, held by any number of owners at once
+                but excluding exclusive owners.
+                On Windows every lock is exclusive.
+        Returns:
+            None
+        """
+        self.path = path
+        self.shared = shared
+        self._file = None
+
+    def acquire(self) -> "_FileLock":
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(
+                self._file.fileno(),
+                fcntl.LOCK_SH if self.shared else fcntl.LOCK_EX
+            )
+            return self
+        self._file.seek(0)
+        while True:
+            # msvcrt 只会重试 10 秒, 之后抛出 OSError
+            try:
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                return self
+            except OSError:
+                continue
+
+    def downgrade(self) -> None:
+        """
+        Turns a held exclusive lock into a shared one.
+
+        Notes:
+            - Not atomic: another exclusive owner may come in between
+            - Keeps the exclusive lock on Windows
+        """
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_SH)
+        self.shared = True
+
+    def release(self) -> None:
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
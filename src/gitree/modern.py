@@ -1,11 +1,19 @@
+import hashlib
 import json
 import os
+import queue
+import threading
+import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Callable, List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional
 
 import requests
 from .base import Configer, _Connect
+from .lock import _FileLock
+from .pack import GiTreePack
+from .store import _ListingStore
 from .utils import cprint, lprint
 from requests import Response
 from rich import print
@@ -13,13 +21,21 @@ from rich import print
 
 class _GiTree(_Connect):
     _METADATA_NAME = "GiTreeMeta.json"
+    _WORKERS       = min(32, (os.cpu_count() or 1) + 4)
     def __init__(
             self,
             owner: str,
             repo: str,
             branch: str = "main",
             ua: str = "",
-            timeout: int | float = 10.0
+            timeout: int | float = 10.0,
+            base_url: str = "",
+            token: str = "",
+            lister: str = "rest",
+            graphql_url: str = "",
+            graphql_depth: int = 3,
+            graphql_batch: int = 10,
+            raw_url: str = ""
     ):
         """
         Args:
@@ -37,11 +53,43 @@ class _GiTree(_Connect):
             timeout (Optional[int|float]):
                 default: 10.0
                 Timeout duration for requests.
+            base_url (Optional[str]):
+                default: ""
+                Url of the root directory listing,
+                e.g. of a locally served mirror. Built from the owner,
+                repo and branch when empty.
+            token (Optional[str]):
+                default: ""
+                GitHub token, sent with every request.
+                Required by the GraphQL lister.
+            lister (Optional[str]):
+                default: "rest"
+                "rest" lists one directory per request (contents endpoint).
+                "graphql" lists `graphql_depth` levels of
+                up to `graphql_batch` directories per request.
+            graphql_url (Optional[str]):
+                default: "https://api.github.com/graphql"
+                Url of the GraphQL endpoint.
+            graphql_depth (Optional[int]):
+                default: 3
+                Tree levels returned per directory by one GraphQL request.
+            graphql_batch (Optional[int]):
+                default: 10
+                Directories listed by one GraphQL request.
+            raw_url (Optional[str]):
+                default: ""
+                Url prefix of the raw files listed by the GraphQL lister,
+                e.g. of a locally served mirror
+                (`<raw_url>/<path>`). Built from the owner, repo and branch
+                on raw.githubusercontent.com when empty.
         Raises:
             TypeError:
-                If timeout is not a numeric type.
+                If timeout is not a numeric type,
+                or graphql_depth or graphql_batch is not an integer.
             ValueError:
-                If timeout is a negative value.
+                If timeout is a negative value,
+                or the lister options are invalid,
+                or the GraphQL lister has no token for GitHub's endpoint.
         Returns:
             None
         """
@@ -57,14 +105,49 @@ class _GiTree(_Connect):
                 The _GiTree's arg `timeout` must greater than or equal(got `{timeout}`)
                 """
             )
+        if lister not in ("rest", "graphql"):
+            raise ValueError(
+                f"""
+                The _GiTree's arg `lister` must be "rest" or "graphql"(got `{lister}`)
+                """
+            )
+        if lister == "graphql" and not token and not graphql_url:
+            raise ValueError(
+                """
+                The _GiTree's arg `token` is required by GitHub's GraphQL API(got an empty token)
+                """
+            )
+        if not isinstance(graphql_depth, int) or not isinstance(graphql_batch, int):
+            raise TypeError(
+                f"""
+                The _GiTree's args `graphql_depth` and `graphql_batch` must be integers.(got `{type(graphql_depth)}`, `{type(graphql_batch)}`)
+                """
+            )
+        if graphql_depth < 1 or graphql_batch < 1:
+            raise ValueError(
+                f"""
+                The _GiTree's args `graphql_depth` and `graphql_batch` must greater than zero(got `{graphql_depth}`, `{graphql_batch}`)
+                """
+            )
         self.owner = owner
         self.repo = repo
         self.branch = branch
+        self.token = token
+        self.lister = lister
+        self.graphql_depth = graphql_depth
+        self.graphql_batch = graphql_batch
         self.pool = requests.Session()
         self.meta = []
+        self._keep_meta = True
         if ua:
             self._UA = ua
         self._build()
+        if base_url:
+            self._BASE_URL = base_url
+        if graphql_url:
+            self._GRAPHQL_URL = graphql_url
+        if raw_url:
+            self._RAW_BASE = raw_url.rstrip("/") + "/;path;"
         self.timeout = timeout
         self._initialize()
 
@@ -80,9 +163,17 @@ class _GiTree(_Connect):
             .replace(";repo;", self.repo)
             .replace(";branch;", self.branch)
         )
+        self._RAW_BASE = (
+            self._RAW_UEL
+            .replace(";owner;", self.owner)
+            .replace(";repo;", self.repo)
+            .replace(";branch;", self.branch)
+        )
         self.headers = {
             "User-Agent": self._UA
         }
+        if self.token:
+            self.headers["Authorization"] = f"bearer {self.token}"
 
     def _capture(self, url: str = "") -> json:
         """
@@ -126,6 +217,8 @@ class _GiTree(_Connect):
                 URL: API URL.
                 download_url: Raw content URL (files only).
                 is_file: Boolean indicating file type.
+                original_sha: Git object sha.
+                size: Size in bytes (0 for directories).
         """
         transformed = []
         for item in original_data:
@@ -138,7 +231,8 @@ class _GiTree(_Connect):
                     'url'         : item['url'],
                     'download_url': item['download_url'],
                     'is_file'     : is_file,
-                    "original_sha": item["sha"]
+                    "original_sha": item["sha"],
+                    "size"        : item.get("size")
                 }
                 transformed.append(transformed_item)
             except TypeError:
@@ -161,7 +255,8 @@ class _GiTree(_Connect):
         """
         data = self._capture(url=url)
         self.data = self._transform(data)
-        self.meta += self.data
+        if self._keep_meta:
+            self.meta += self.data
         self.waiting_dir = dict()
         self.files = dict()
         for element in self.data:
@@ -180,30 +275,190 @@ class _GiTree(_Connect):
                 }
             )
 
+    @classmethod
+    def _graphql_fields(cls, depth: int) -> str:
+        """
+        Returns:
+            GraphQL selection of `depth` levels of `Tree.entries`,
+            with blob sizes.
+        """
+        nested = f" ... on Tree {{ {cls._graphql_fields(depth - 1)} }}" \
+            if depth > 1 \
+            else ""
+        return f"entries {{ name path type oid object {{ ... on Blob {{ byteSize }}{nested} }} }}"
+
+    def _capture_graphql(self, paths: List[str]) -> json:
+        """
+        Fetches several directories from the GitHub GraphQL API
+        in a single request, one alias (`d0`, `d1`, ...) per directory.
+
+        Args:
+            paths: Repository relative directory paths, `""` for the root.
+
+        Returns:
+            Parsed JSON response or error dictionary, like `_capture`.
+        """
+        fields = self._graphql_fields(self.graphql_depth)
+        aliases = " ".join(
+            f"d{i}: object(expression: {json.dumps(f'{self.branch}:{path}')}) "
+            f"{{ ... on Tree {{ {fields} }} }}"
+            for i, path in enumerate(paths)
+        )
+        query = "query($owner: String!, $name: String!) " \
+                f"{{ repository(owner: $owner, name: $name) {{ {aliases} }} }}"
+        try:
+            return self.pool.post(
+                self._GRAPHQL_URL,
+                json={
+                    "query": query,
+                    "variables": {"owner": self.owner, "name": self.repo}
+                },
+                headers=self.headers,
+                timeout=self.timeout
+            ).json()
+        except Exception as e:
+            return {
+                "status": "error",
+                "type": type(e).__name__,
+                "description": repr(e)
+            }
+
+    def _transform_graphql(self, entries: List[dict], frontier: List[str]) -> List[dict]:
+        """
+        Transforms GraphQL `Tree.entries` into the format of `_transform`.
+
+        Args:
+            entries: Entries of one tree, possibly with nested entries.
+            frontier: Receives the paths of directories
+                whose entries were not returned yet.
+
+        Returns:
+            Flattened list of transformed entries, nested ones included.
+        """
+        transformed = []
+        for item in entries:
+            is_file = item["type"] == "blob"
+            path = item["path"]
+            obj = item.get("object") or {}
+            transformed.append(
+                {
+                    'name'        : item['name'],
+                    'path'        : path,
+                    'html_url'    : f"{self._DOMAIN_URL}/{self.owner}/{self.repo}/"
+                                    f"{'blob' if is_file else 'tree'}/{self.branch}/{path}",
+                    'url'         : self._CONTENTS_URL
+                                    .replace(";owner;", self.owner)
+                                    .replace(";repo;", self.repo)
+                                    .replace(";path;", path)
+                                    .replace(";branch;", self.branch),
+                    'download_url': self._RAW_BASE.replace(";path;", path)
+                                    if is_file else None,
+                    'is_file'     : is_file,
+                    "original_sha": item["oid"],
+                    "size"        : obj.get("byteSize", 0)
+                }
+            )
+            if item["type"] != "tree":
+                continue
+            if "entries" in obj:
+                transformed += self._transform_graphql(obj["entries"], frontier)
+            else:
+                frontier.append(path)
+        return transformed
+
+    def _process_batch(self, paths: List[str]) -> None:
+        """
+        GraphQL counterpart of `_process`, for several directories at once.
+
+        Args:
+            paths: Repository relative directory paths, `""` for the root.
+
+        Notes:
+            - Populates `files` like `_process`
+            - `waiting_dir` maps paths to paths,
+              for the directories deeper than `graphql_depth`
+        """
+        response = self._capture_graphql(paths)
+        repository = (response.get("data") or {}).get("repository") or {}
+        if "errors" in response or response.get("status") == "error":
+            lprint(f"GraphQL listing failed: {response.get('errors', response.get('description'))}", prefix="[Err ]")
+        frontier = []
+        self.data = []
+        for i, path in enumerate(paths):
+            tree = repository.get(f"d{i}")
+            if not tree:
+                lprint(f"Failed when list {path or '/'}", prefix="[Err ]")
+                continue
+            self.data += self._transform_graphql(tree["entries"], frontier)
+        if self._keep_meta:
+            self.meta += self.data
+        self.waiting_dir = {path: path for path in frontier}
+        self.files = {
+            element["path"]: element["download_url"]
+            for element in self.data
+            if element["is_file"]
+        }
+
+    @property
+    def _frontier_size(self) -> int:
+        """
+        Number of pending directories listed by one request.
+        """
+        return self.graphql_batch if self.lister == "graphql" else 1
+
+    def _advance(self, frontier: List[str]) -> None:
+        """
+        Lists pending directories with the selected lister.
+
+        Args:
+            frontier: At most `_frontier_size` values of `waiting_dir`,
+                `""` for the root.
+        """
+        if self.lister == "graphql":
+            self._process_batch(frontier)
+        else:
+            self._process(url=frontier[0])
+
+    def walk(self) -> Iterator[dict]:
+        """
+        Performs breadth-first traversal of
+        repository directory structure, lazily.
+
+        Yields:
+            Transformed entries (see `_transform`) of files and directories,
+            as soon as the directory containing them has been processed.
+
+        Notes:
+            - Only the pending directory urls are kept between steps
+            - Entries are still accumulated in `self.meta`
+        """
+        pending = deque([""])
+        while pending:
+            self._advance(
+                [pending.popleft() for _ in range(min(self._frontier_size, len(pending)))]
+            )
+            yield from self.data
+            pending.extend(self.waiting_dir.values())
+
     def _loop(self) -> None:
         """
         Performs breadth-first traversal of
         repository directory structure.
 
         Notes:
-            - Processes root directory first
-            - Uses queue to handle subdirectories recursively
+            - Consumes `walk` completely
             - Maintains complete file list in `self.files`
             - Clears waiting_dir after completion
         Returns: None
         """
-        if self.data is None:
-            self._process()
-
-        queue = list(self.waiting_dir.values())
-        all_files = self.files.copy()
-
-        while queue:
-            current_url = queue.pop(0)
-            self._process(url=current_url)
-
-            all_files.update(self.files)
-            queue.extend(self.waiting_dir.values())
+        all_files = dict()
+        for element in self.walk():
+            if element["is_file"]:
+                all_files.update(
+                    {
+                        element["path"]: element["download_url"]
+                    }
+                )
 
         self.files = all_files
         self.waiting_dir.clear()
@@ -235,7 +490,7 @@ class _GiTree(_Connect):
         Manages multithreaded file downloads.
         Args:
             download_func: Download function to execute
-            files: List of tuples (path, url) to download
+            files: List of tuples (path, url, ...) to download
             total_files: Total number of files for progress tracking
         Notes:
             - Uses ThreadPoolExecutor for concurrent downloads
@@ -245,13 +500,13 @@ class _GiTree(_Connect):
         with ThreadPoolExecutor() as executor:
             # 创建任务列表
             futures = {
-                executor.submit(download_func, path, url): (path, url)
-                for path, url in files
+                executor.submit(download_func, *task): task
+                for task in files
             }
 
             # 处理完成的任务
             for i, future in enumerate(as_completed(futures), 1):
-                path, url = futures[future]
+                path = futures[future][0]
                 try:
                     success = future.result()
                     if success:
@@ -261,22 +516,111 @@ class _GiTree(_Connect):
                     lprint(f"Error processing {path}: {str(e)}", prefix="[Err ]")
                     continue
 
-    def _build_metadata(self, repo_dir_path: str):
+    @classmethod
+    def _pipeline_download(
+            cls,
+            download_func: Callable,
+            files: Iterable[tuple],
+            queue_size: int
+    ) -> int:
+        """
+        Manages streaming multithreaded file downloads.
+        Args:
+            download_func: Download function to execute
+            files: Iterable of tuples (path, url, ...), may still be producing
+            queue_size: Maximum number of files waiting for a worker
+        Returns:
+            Number of files downloaded successfully
+        Notes:
+            - The caller's thread produces, `_WORKERS` threads consume
+            - The bounded queue blocks the producer when workers fall behind
+            - Handles and logs exceptions during download
+        """
+        pending = queue.Queue(maxsize=queue_size)
+        lock = threading.Lock()
+        downloaded = 0
+
+        def consume():
+            nonlocal downloaded
+            while True:
+                task = pending.get()
+                if task is None:
+                    return
+                path = task[0]
+                try:
+                    if download_func(*task):
+                        with lock:
+                            downloaded += 1
+                            i = downloaded
+                        lprint(f"Downloaded [{i}]: {path}")
+                except Exception as e:
+                    lprint(f"Error processing {path}: {str(e)}", prefix="[Err ]")
+
+        with ThreadPoolExecutor(max_workers=cls._WORKERS) as executor:
+            for _ in range(cls._WORKERS):
+                executor.submit(consume)
+            try:
+                for task in files:
+                    pending.put(task)
+            finally:
+                # 每个消费者一个结束标记
+                for _ in range(cls._WORKERS):
+                    pending.put(None)
+        return downloaded
+
+    def _build_metadata(
+            self,
+            repo_dir_path: str,
+            entries: Optional[Iterable[dict]] = None
+    ):
+        """
+        Writes the metadata file.
+
+        Args:
+            repo_dir_path: Directory to write the metadata file into
+            entries: Entries to write, one at a time. Defaults to `self.meta`.
+
+        Notes:
+            - Writes a temporary file first and replaces the metadata file
+              with it, so readers never see a partial file
+        """
+        meta_path = os.path.join(repo_dir_path, self._METADATA_NAME)
+        temp_path = f"{meta_path}.{os.getpid()}.tmp"
         with open(
-            os.path.join(repo_dir_path, self._METADATA_NAME),
+            temp_path,
             "w",
             encoding = "utf-8"
         ) as f:
-            json.dump(self.meta, f, indent = 4)
+            if entries is None:
+                json.dump(self.meta, f, indent = 4)
+            else:
+                # 与 json.dump(..., indent=4) 的输出格式保持一致
+                separator = "[\n    "
+                for entry in entries:
+                    f.write(separator)
+                    f.write(json.dumps(entry, indent = 4).replace("\n", "\n    "))
+                    separator = ",\n    "
+                f.write("[]" if separator == "[\n    " else "\n]")
+        os.replace(temp_path, meta_path)
 
 
 class GiTree(_GiTree):
+    _INDEX_NAME   = "GiTreeIndex.sqlite"
+    _LOCK_DIR     = ".gitree"
+    _LOCK_STRIPES = 256
     def __init__(
             self,
             *args,
             chunk_size: Optional[int] = 1024,
             save_path: Optional[str] = None,
             when_to_thread: Optional[int] = None,
+            stream: Optional[bool] = False,
+            queue_size: Optional[int] = 64,
+            low_memory: Optional[bool] = False,
+            window: Optional[int] = 1000,
+            output: Optional[str] = "tree",
+            shared: Optional[bool] = False,
+            listing_ttl: Optional[int | float] = 300,
             **kwargs
     ):
         """
@@ -303,6 +647,51 @@ class GiTree(_GiTree):
                 If it is less than zero,
                 then the program will not use multi-threading to download files.
 
+            stream         (Optional[bool]):
+                default: `False`
+                Start downloading while the traversal is still running,
+                instead of waiting for the complete file list.
+
+            queue_size     (Optional[int]):
+                default: `64`
+                In stream mode, the maximum number of discovered files
+                waiting for a download worker.
+
+            low_memory     (Optional[bool]):
+                default: `False`
+                Keep the listing in an on-disk SQLite index
+                (`GiTreeIndex.sqlite` in the save directory)
+                instead of in memory, so memory use does not grow
+                with the number of entries. Takes precedence over `stream`.
+
+            window         (Optional[int]):
+                default: `1000`
+                In low memory mode, the number of entries
+                read from the index at a time.
+
+            output         (Optional[str]):
+                default: `"tree"`
+                `"tree"` writes the files into the save directory.
+                `"pack"` writes them as git blobs, plus the git trees,
+                into a single archive (`GiTree.pack`) with an index,
+                see `GiTreePack`. Blobs already in the archive
+                are not downloaded again.
+
+            shared         (Optional[bool]):
+                default: `False`
+                Coordinate with other processes using the same save path
+                through lock files (in `.gitree` in the save directory):
+                one process lists the repository and the others reuse
+                the listing, one process fetches each file and the others
+                reuse it, and the metadata file is written only by
+                the process that lists. `stream` is ignored in this mode.
+
+            listing_ttl    (Optional[int|float]):
+                default: `300`
+                In shared mode, the age in seconds up to which
+                a listing written by another run is reused,
+                counted from the time it was listed.
+
             **kwargs                 (Any): Inherited from the parent class `_GiTree`
                 branch  (Optional[str]):
                     default: "main"
@@ -316,6 +705,20 @@ class GiTree(_GiTree):
                 timeout (Optional[int|float]):
                     default: 10.0
                     Timeout duration for requests.
+
+                base_url (Optional[str]):
+                    default: ""
+                    Url of the root directory listing.
+
+                token   (Optional[str]):
+                    default: ""
+                    GitHub token, required by the GraphQL lister.
+
+                lister  (Optional[str]):
+                    default: "rest"
+                    "rest" or "graphql", see `_GiTree`.
+                    Also `graphql_url`, `graphql_depth`, `graphql_batch`
+                    and `raw_url`.
         """
         super().__init__(*args, **kwargs)
         self.save_path = None
@@ -329,6 +732,32 @@ class GiTree(_GiTree):
             if when_to_thread is None \
             else when_to_thread
 
+        if not isinstance(queue_size, int):
+            raise TypeError(f"The `GiTree.__init__`'s arg `queue_size` must be a integer.(got {queue_size})")
+        if queue_size <= 0:
+            raise ValueError(f"The `GiTree.__init__`'s arg `queue_size` must greater than zero.(got {queue_size})")
+        self.stream = stream
+        self.queue_size = queue_size
+
+        if not isinstance(window, int):
+            raise TypeError(f"The `GiTree.__init__`'s arg `window` must be a integer.(got {window})")
+        if window <= 0:
+            raise ValueError(f"The `GiTree.__init__`'s arg `window` must greater than zero.(got {window})")
+        self.low_memory = low_memory
+        self._keep_meta = not low_memory
+        self.window = window
+
+        if output not in ("tree", "pack"):
+            raise ValueError(f"The `GiTree.__init__`'s arg `output` must be \"tree\" or \"pack\".(got {output})")
+        self.output = output
+        self.pack: Optional[GiTreePack] = None
+
+        if not isinstance(listing_ttl, (int, float)):
+            raise TypeError(f"The `GiTree.__init__`'s arg `listing_ttl` must be a number.(got {listing_ttl})")
+        self.shared = shared
+        self.listing_ttl = listing_ttl
+        self._paths_lock: Optional[_FileLock] = None
+
         self.chunk_size = chunk_size
         self._initialize_path(save_path)
 
@@ -377,13 +806,14 @@ class GiTree(_GiTree):
                 f"The `GiTree.initialize`'s arg `path` is not a valid path.(got `{self.save_path}`)"
             ) from e
 
-    def _download_file(self, path: str, url: str) -> bool:
+    def _download_file(self, path: str, url: str, sha: str = "") -> bool:
         """
         Downloads and saves a single file.
 
         Args:
             path (str): Repository relative file path
             url  (str): Download URL for the file
+            sha  (str): Git blob sha of the file, if known
 
         Returns:
             True if download successful, False otherwise
@@ -392,10 +822,41 @@ class GiTree(_GiTree):
             - Creates necessary directory structure
             - Uses streaming download with chunked writing
             - Handles HTTP errors and exceptions
+            - Delegates to _pack_file in pack output mode
         """
+        if self.output == "pack":
+            if not self.shared:
+                return self._pack_file(path, url, sha)
+            with self._blob_lock(sha or path):
+                return self._pack_file(path, url, sha)
         save_to = os.path.join(self.save_dir, path).replace("\\", "/")
         os.makedirs(os.path.dirname(save_to), exist_ok=True)
+        if not self.shared:
+            return self._write_file(path, url, save_to)
+        with self._blob_lock(path):
+            if sha and os.path.isfile(save_to) and GiTreePack.hash_file(save_to) == sha:
+                # 其他进程已经下载过这个文件
+                return True
+            temp_path = f"{save_to}.{os.getpid()}.{threading.get_ident()}.tmp"
+            if not self._write_file(path, url, temp_path):
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return False
+            os.replace(temp_path, save_to)
+            return True
+
+    def _write_file(self, path: str, url: str, save_to: str) -> bool:
+        """
+        Downloads a single file to `save_to`.
+
+        Args:
+            path    (str): Repository relative file path, for messages
+            url     (str): Download URL for the file
+            save_to (str): Local file to write
 
+        Returns:
+            True if download successful, False otherwise
+        """
         try:
             response = self._download(url)
             if response.status_code != 200:
@@ -411,12 +872,153 @@ class GiTree(_GiTree):
             lprint(f"Error downloading {path}: {str(e)}", prefix="[Err ]")
             return False
 
+    def _pack_file(self, path: str, url: str, sha: str = "") -> bool:
+        """
+        Downloads a single file into the pack.
+
+        Args:
+            path (str): Repository relative file path
+            url  (str): Download URL for the file
+            sha  (str): Git blob sha of the file, if known
+
+        Returns:
+            True if the file is in the pack, False otherwise
+
+        Notes:
+            - Skips the download when the blob is already in the pack
+            - Warns when the content does not hash to `sha`
+        """
+        if sha and self.pack.has(sha):
+            self.pack.bind(path, sha)
+            return True
+        try:
+            response = self._download(url)
+            if response.status_code != 200:
+                lprint(f"Failed when download {path} (Status: {response.status_code})", prefix="[Err ]")
+                return False
+
+            data = b"".join(response.iter_content(self.chunk_size))
+            stored = self.pack.put(data)
+            if sha and stored != sha:
+                lprint(f"Sha mismatch for {path} (expected {sha}, got {stored})", prefix="[Warn]")
+            self.pack.bind(path, stored)
+            return True
+        except Exception as e:
+            lprint(f"Error downloading {path}: {str(e)}", prefix="[Err ]")
+            return False
+
+    def _lock(self, name: str) -> _FileLock:
+        """
+        Returns:
+            The cross-process lock `name` of the save directory.
+        """
+        return _FileLock(os.path.join(self.save_dir, self._LOCK_DIR, name))
+
+    def _blob_lock(self, key: str) -> _FileLock:
+        """
+        Returns:
+            The cross-process lock of file path or blob sha `key`.
+
+        Notes:
+            - Keys share `_LOCK_STRIPES` lock files,
+              so the number of lock files stays bounded
+        """
+        stripe = int(hashlib.sha1(key.encode()).hexdigest(), 16) % self._LOCK_STRIPES
+        return self._lock(f"blobs/{stripe:02x}.lock")
+
+    def _stamp(self, name: str, listed_at: float) -> None:
+        """
+        Records in `.gitree/<name>.stamp` when the listing `name` was made.
+        """
+        stamp_path = os.path.join(self.save_dir, self._LOCK_DIR, f"{name}.stamp")
+        temp_path = f"{stamp_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(repr(listed_at))
+        os.replace(temp_path, stamp_path)
+
+    def _is_fresh(self, name: str) -> bool:
+        """
+        Returns:
+            Whether the listing `name` was made less than `listing_ttl` ago.
+
+        Notes:
+            - Reads the time from its stamp (see `_stamp`),
+              not from the mtime of the listing file
+        """
+        stamp_path = os.path.join(self.save_dir, self._LOCK_DIR, f"{name}.stamp")
+        try:
+            with open(stamp_path, "r", encoding="utf-8") as f:
+                listed_at = float(f.read())
+        except (OSError, ValueError):
+            return False
+        return time.time() - listed_at < self.listing_ttl
+
+    def _shared_loop(self) -> None:
+        """
+        `_loop` for shared mode.
+
+        Notes:
+            - Only one process lists the repository at a time
+            - Reuses the metadata file as the listing while it is fresh,
+              otherwise lists and writes it right away for the others.
+              Runs reusing it never write it
+        """
+        with self._lock("listing.lock"):
+            meta_path = os.path.join(self.save_dir, self._METADATA_NAME)
+            if self._is_fresh("listing") and os.path.isfile(meta_path):
+                self._hold_pack_paths(relisting=False)
+                with open(meta_path, "r", encoding="utf-8") as f:
+                    self.meta = json.load(f)
+                self.files = {
+                    element["path"]: element["download_url"]
+                    for element in self.meta
+                    if element["is_file"]
+                }
+                lprint("Reusing the listing of another run...")
+                return
+            self._hold_pack_paths(relisting=True)
+            listed_at = time.time()
+            self._loop()
+            self._build_metadata(self.save_dir)
+            self._stamp("listing", listed_at)
+
+    def _hold_pack_paths(self, relisting: bool) -> None:
+        """
+        Holds `paths.lock` over the path bindings of the pack
+        until `gets` ends, see `_release_pack_paths`.
+
+        Args:
+            relisting: Whether this run lists the repository anew.
+                It then takes the lock exclusively, waiting for the runs
+                still binding paths of the previous listing,
+                and forgets their bindings, so paths removed
+                from the branch do not reach its trees.
+
+        Notes:
+            - Called under `listing.lock`,
+              so no other run relists between clearing and downgrading
+        """
+        if self.pack is None:
+            return
+        self._paths_lock = _FileLock(
+            os.path.join(self.save_dir, self._LOCK_DIR, "paths.lock"),
+            shared=not relisting
+        ).acquire()
+        if relisting:
+            self.pack.clear_paths()
+            self._paths_lock.downgrade()
+
+    def _release_pack_paths(self) -> None:
+        if self._paths_lock is not None:
+            self._paths_lock.release()
+            self._paths_lock = None
+
     def _thread_download_files(self, files: List[tuple]) -> None:
         """
         Initiates multithreaded download process.
 
         Args:
-            files (List[tuple]): List of tuples (path, url) to download
+            files (List[tuple]): List of tuples (path, url, sha) to download
 
         Notes:
             - Prints start message with file count
@@ -431,33 +1033,163 @@ class GiTree(_GiTree):
             total_files
         )
 
+    def _stream_download_files(self) -> int:
+        """
+        Downloads files while the traversal is still running.
+
+        Returns:
+            Number of files downloaded successfully
+
+        Notes:
+            - Feeds entries from `walk` to `_pipeline_download`
+        """
+        lprint("Starting streaming download...")
+        files = (
+            (element["path"], element["download_url"], element["original_sha"])
+            for element in self.walk()
+            if element["is_file"]
+        )
+        return self._pipeline_download(
+            self._download_file,
+            files,
+            self.queue_size
+        )
+
+    def _index_files(self) -> _ListingStore:
+        """
+        Traverses the repository into the on-disk index.
+
+        Returns:
+            The listing store, holding every entry of the repository
+
+        Notes:
+            - Breadth-first, like `walk`, but the frontier lives in the index too
+            - Only one directory listing is held in memory at a time
+            - In shared mode, only one process lists the repository at a time,
+              reusing the index while it is fresh, otherwise building
+              a new one beside it, replacing it when complete
+              and writing the metadata file from it for the others
+        """
+        index_path = os.path.join(self.save_dir, self._INDEX_NAME)
+        if not self.shared:
+            return self._build_index(index_path)
+        with self._lock("listing.lock"):
+            if self._is_fresh("index") and os.path.isfile(index_path):
+                store = _ListingStore(index_path, reset=False)
+                if store.is_complete():
+                    self._hold_pack_paths(relisting=False)
+                    lprint("Reusing the listing of another run...")
+                    return store
+                store.close()
+            self._hold_pack_paths(relisting=True)
+            listed_at = time.time()
+            temp_path = f"{index_path}.{os.getpid()}.tmp"
+            self._build_index(temp_path).close()
+            os.replace(temp_path, index_path)
+            store = _ListingStore(index_path, reset=False)
+            self._build_metadata(self.save_dir, store.entries(self.window))
+            self._stamp("index", listed_at)
+            self._stamp("listing", listed_at)
+            return store
+
+    def _build_index(self, index_path: str) -> _ListingStore:
+        store = _ListingStore(index_path)
+        store.push([""])
+        while frontier := store.pop(self._frontier_size):
+            self._advance(frontier)
+            store.add(self.data)
+            store.push(self.waiting_dir.values())
+        store.mark_complete()
+        return store
+
+    def _low_memory_gets(self) -> None:
+        """
+        Bounded memory variant of `gets`.
+
+        Notes:
+            - Lists the repository into the index via _index_files
+            - Feeds downloads from the index, `window` entries at a time
+            - Streams the metadata file from the index,
+              in shared mode right after listing (see `_index_files`)
+        """
+        store = self._index_files()
+        try:
+            lprint(f"Total files to download: {store.count_files()}")
+            lprint("Starting low memory download...")
+            self._pipeline_download(
+                self._download_file,
+                store.files(self.window),
+                self.queue_size
+            )
+            if not self.shared:
+                self._build_metadata(self.save_dir, store.entries(self.window))
+        finally:
+            store.close()
+
     def gets(self)->None:
         """
         Main method to retrieve and download repository contents.
 
         Workflow:
-            1. Builds complete file list via _loop
-            2. Prints save location and file count
-            3. Selects download method based on file count threshold:
+            1. Prints save location, opens the pack in pack output mode
+            2. In low memory mode, delegates to _low_memory_gets.
+               In stream mode, downloads files as they are discovered
+               via _stream_download_files.
+               Otherwise builds complete file list via _loop
+               (_shared_loop in shared mode),
+               then selects download method based on file count threshold:
                - Sequential download for small file sets
                - Threaded download for large file sets
+            3. In pack output mode, writes the trees and closes the pack
             4. Prints final success message
 
         Notes:
             - Download method selection controlled by when_to_thread threshold
         Returns: None
         """
-        self._loop()
         lprint(f"Repository files will be saved to: ;ff4433;{self.save_dir}")
-        lprint(f"Total files to download: {len(self.files)}")
-
-        files_list = list(self.files.items())
-        if len(files_list) < self.when_to_thread:
-            lprint("Using sequential download...")
-            for i, (path, url) in enumerate(files_list, 1):
-                lprint(f"Downloading [{i}/{len(files_list)}]: {path}")
-                self._download_file(path, url)
-        else:
-            self._thread_download_files(files_list)
-        self._build_metadata(self.save_dir)
+        if self.output == "pack":
+            self.pack = GiTreePack(self.save_dir)
+            if not self.shared:
+                # 共享模式下在 listing.lock 内重新列出时才清除, 见 _hold_pack_paths
+                self.pack.clear_paths()
+        try:
+            if self.low_memory:
+                self._low_memory_gets()
+            elif self.stream and not self.shared:
+                total = self._stream_download_files()
+                lprint(f"Total files downloaded: {total}")
+                self._build_metadata(self.save_dir)
+            else:
+                if self.shared:
+                    self._shared_loop()
+                else:
+                    self._loop()
+                lprint(f"Total files to download: {len(self.files)}")
+
+                shas = {
+                    element["path"]: element["original_sha"]
+                    for element in self.meta
+                    if element["is_file"]
+                }
+                files_list = [
+                    (path, url, shas.get(path, ""))
+                    for path, url in self.files.items()
+                ]
+                if len(files_list) < self.when_to_thread:
+                    lprint("Using sequential download...")
+                    for i, (path, url, sha) in enumerate(files_list, 1):
+                        lprint(f"Downloading [{i}/{len(files_list)}]: {path}")
+                        self._download_file(path, url, sha)
+                else:
+                    self._thread_download_files(files_list)
+                if not self.shared:
+                    self._build_metadata(self.save_dir)
+            if self.pack is not None:
+                lprint(f"Root tree written to pack: {self.pack.write_trees()}")
+        finally:
+            self._release_pack_paths()
+            if self.pack is not None:
+                self.pack.close()
+                self.pack = None
         lprint(";#228B22;All files downloaded successfully!")
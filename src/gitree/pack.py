@@ -0,0 +1,272 @@
+import hashlib
+import os
+import posixpath
+import sqlite3
+import threading
+import zlib
+from typing import Iterator, Optional
+
+from .lock import _FileLock
+
+
+class GiTreePack:
+    """
+    This is a pack-like object store,
+    which keeps git objects (blobs and trees) in a single archive file
+    and their locations in an SQLite index.
+
+    Objects are stored like git loose objects,
+    zlib compressed with a `<kind> <size>\\0` header,
+    and keyed by their git sha1, which is the `sha` GitHub reports.
+    """
+    PACK_NAME  = "GiTree.pack"
+    INDEX_NAME = "GiTree.pack.sqlite"
+    LOCK_PATH  = os.path.join(".gitree", "pack.lock")
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str):
+                The directory holding the archive and its index.
+                Both are created when missing.
+        Returns:
+            None
+        """
+        self.pack_path = os.path.join(directory, self.PACK_NAME)
+        self.lock_path = os.path.join(directory, self.LOCK_PATH)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(directory, self.INDEX_NAME),
+            timeout=60,
+            check_same_thread=False
+        )
+        with self._lock, self._conn:
+            # 每个对象一次提交, WAL 避免每次提交都同步整个文件
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS objects (
+                    sha TEXT PRIMARY KEY, kind TEXT,
+                    offset INTEGER, length INTEGER, size INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS paths (path TEXT PRIMARY KEY, sha TEXT);
+                """
+            )
+
+    @staticmethod
+    def hash_object(data: bytes, kind: str = "blob") -> str:
+        """
+        Returns:
+            The git sha1 of `data` as an object of `kind`.
+        """
+        header = f"{kind} {len(data)}\0".encode()
+        return hashlib.sha1(header + data).hexdigest()
+
+    @staticmethod
+    def hash_file(path: str, chunk_size: int = 65536) -> str:
+        """
+        Returns:
+            The git blob sha1 of the file at `path`, read in chunks.
+        """
+        sha = hashlib.sha1(f"blob {os.path.getsize(path)}\0".encode())
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def has(self, sha: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM objects WHERE sha = ?", (sha,)
+            ).fetchone() is not None
+
+    def put(self, data: bytes, kind: str = "blob") -> str:
+        """
+        Appends an object to the archive, unless it is already stored.
+
+        Returns:
+            The git sha1 of the object.
+
+        Notes:
+            - Appends under a file lock, so several processes
+              can share one archive
+        """
+        sha = self.hash_object(data, kind)
+        header = f"{kind} {len(data)}\0".encode()
+        compressed = zlib.compress(header + data)
+        with self._lock, _FileLock(self.lock_path):
+            if self._conn.execute(
+                "SELECT 1 FROM objects WHERE sha = ?", (sha,)
+            ).fetchone() is not None:
+                return sha
+            with open(self.pack_path, "ab") as f:
+                f.seek(0, os.SEEK_END)
+                offset = f.tell()
+                f.write(compressed)
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO objects VALUES (?, ?, ?, ?, ?)",
+                    (sha, kind, offset, len(compressed), len(data))
+                )
+        return sha
+
+    def bind(self, path: str, sha: str) -> None:
+        """
+        Records that repository path `path` holds object `sha`.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO paths VALUES (?, ?)", (path, sha)
+            )
+
+    def clear_paths(self) -> None:
+        """
+        Forgets every path, keeping the objects for later re-syncs.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM paths")
+
+    def resolve(self, path: str) -> Optional[str]:
+        """
+        Returns:
+            The sha of the object at `path`, or `None` if unknown.
+            The root tree is at path `""`.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sha FROM paths WHERE path = ?", (path,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def paths(self, window: int = 1000) -> Iterator[str]:
+        """
+        Yields:
+            The bound paths in order, read `window` at a time.
+        """
+        last = None
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT path FROM paths WHERE ? IS NULL OR path > ? "
+                    "ORDER BY path LIMIT ?",
+                    (last, last, window)
+                ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for row in rows:
+                yield row[0]
+
+    def get(self, sha: str) -> bytes:
+        """
+        Returns:
+            The content of object `sha`, without its header.
+
+        Raises:
+            KeyError: If the object is not stored.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT offset, length FROM objects WHERE sha = ?", (sha,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(sha)
+        with open(self.pack_path, "rb") as f:
+            f.seek(row[0])
+            raw = zlib.decompress(f.read(row[1]))
+        return raw[raw.index(b"\0") + 1:]
+
+    def read(self, path: str) -> bytes:
+        """
+        Returns:
+            The content stored at repository path `path`.
+
+        Raises:
+            KeyError: If the path is unknown.
+        """
+        sha = self.resolve(path)
+        if sha is None:
+            raise KeyError(path)
+        return self.get(sha)
+
+    def write_trees(self, window: int = 1000) -> str:
+        """
+        Builds git tree objects for every directory of the bound paths.
+
+        Args:
+            window: Number of directories read from the index at a time.
+
+        Returns:
+            The sha of the root tree.
+
+        Notes:
+            - Works in temporary tables of the index,
+              from the deepest directories to the root,
+              so only one directory is held in memory at a time
+            - Files get mode `100644`, directories `40000`,
+              so trees with executables or symlinks
+              do not hash like GitHub's
+        """
+        with self._lock, self._conn:
+            self._conn.create_function("dirname", 1, posixpath.dirname, deterministic=True)
+            self._conn.create_function("basename", 1, posixpath.basename, deterministic=True)
+            self._conn.executescript(
+                """
+                DROP TABLE IF EXISTS temp.nodes;
+                DROP TABLE IF EXISTS temp.dirs;
+                CREATE TEMP TABLE nodes (dir TEXT, name TEXT, mode TEXT, sha TEXT);
+                CREATE INDEX temp.nodes_dir ON nodes (dir);
+                CREATE TEMP TABLE dirs (dir TEXT);
+                INSERT INTO nodes
+                    SELECT dirname(paths.path), basename(paths.path), '100644', paths.sha
+                    FROM paths JOIN objects ON objects.sha = paths.sha
+                    WHERE objects.kind = 'blob';
+                INSERT INTO dirs
+                    WITH RECURSIVE ancestors(dir) AS (
+                        SELECT dir FROM nodes UNION SELECT ''
+                        UNION SELECT dirname(dir) FROM ancestors WHERE dir != ''
+                    )
+                    SELECT dir FROM ancestors
+                    ORDER BY length(dir) - length(replace(dir, '/', '')) + (dir != '') DESC;
+                """
+            )
+        # dirs 的 rowid 自深向浅, 子树先于父树
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, dir FROM temp.dirs WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last, window)
+                ).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            for _, directory in rows:
+                with self._lock:
+                    entries = self._conn.execute(
+                        "SELECT name, mode, sha FROM temp.nodes WHERE dir = ? "
+                        "ORDER BY CASE mode WHEN '40000' THEN name || '/' ELSE name END",
+                        (directory,)
+                    ).fetchall()
+                data = b"".join(
+                    f"{mode} {name}\0".encode() + bytes.fromhex(sha)
+                    for name, mode, sha in entries
+                )
+                sha = self.put(data, "tree")
+                self.bind(directory, sha)
+                if directory:
+                    with self._lock, self._conn:
+                        self._conn.execute(
+                            "INSERT INTO temp.nodes VALUES (?, ?, '40000', ?)",
+                            (posixpath.dirname(directory), posixpath.basename(directory), sha)
+                        )
+        with self._lock, self._conn:
+            self._conn.executescript(
+                "DROP TABLE temp.nodes; DROP TABLE temp.dirs;"
+            )
+        return self.resolve("")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,163 @@
+import sqlite3
+import threading
+from typing import Iterable, Iterator, List
+
+
+class _ListingStore:
+    """
+    This is an on-disk listing store,
+    which keeps the traversal frontier and the repository entries
+    in a SQLite file instead of in memory.
+    """
+    _COLUMNS = (
+        "name",
+        "path",
+        "html_url",
+        "url",
+        "download_url",
+        "is_file",
+        "original_sha",
+        "size"
+    )
+
+    def __init__(self, db_path: str, reset: bool = True):
+        """
+        Args:
+            db_path (str):
+                The SQLite file to store the listing in.
+            reset (bool):
+                default: True
+                Drop any listing already stored in it.
+        Returns:
+            None
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        if reset:
+            self._reset()
+
+    def _reset(self) -> None:
+        columns = ", ".join(self._COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executescript(
+                f"""
+                DROP TABLE IF EXISTS entries;
+                DROP TABLE IF EXISTS frontier;
+                DROP TABLE IF EXISTS state;
+                CREATE TABLE entries ({columns});
+                CREATE TABLE frontier (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT);
+                CREATE TABLE state (complete INTEGER);
+                """
+            )
+
+    def mark_complete(self) -> None:
+        """
+        Records that the traversal finished, so the listing can be reused.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO state VALUES (1)")
+
+    def is_complete(self) -> bool:
+        with self._lock:
+            try:
+                return self._conn.execute(
+                    "SELECT 1 FROM state WHERE complete"
+                ).fetchone() is not None
+            except sqlite3.OperationalError:
+                return False
+
+    def add(self, entries: Iterable[dict]) -> None:
+        """
+        Appends transformed entries (see `_GiTree._transform`) to the store.
+        """
+        placeholders = ", ".join("?" for _ in self._COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO entries VALUES ({placeholders})",
+                (
+                    tuple(entry[column] for column in self._COLUMNS)
+                    for entry in entries
+                )
+            )
+
+    def push(self, urls: Iterable[str]) -> None:
+        """
+        Appends directory urls to the traversal frontier.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO frontier (url) VALUES (?)",
+                ((url,) for url in urls)
+            )
+
+    def pop(self, limit: int = 1) -> List[str]:
+        """
+        Removes and returns the oldest urls of the traversal frontier.
+
+        Returns:
+            At most `limit` urls, none when the frontier is empty.
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                "SELECT id, url FROM frontier ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    "DELETE FROM frontier WHERE id <= ?", (rows[-1][0],)
+                )
+            return [row[1] for row in rows]
+
+    def count_files(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE is_file"
+            ).fetchone()[0]
+
+    def _window(self, query: str, window: int) -> Iterator[tuple]:
+        """
+        Iterates over the rows of `query`, reading `window` rows at a time.
+
+        Notes:
+            - `query` must select `rowid` first
+              and accept the last seen rowid and the window size
+        """
+        last = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(query, (last, window)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for row in rows:
+                yield row[1:]
+
+    def files(self, window: int) -> Iterator[tuple]:
+        """
+        Yields:
+            Tuples (path, url, sha) of the stored files, in traversal order.
+        """
+        yield from self._window(
+            "SELECT rowid, path, download_url, original_sha FROM entries "
+            "WHERE is_file AND rowid > ? ORDER BY rowid LIMIT ?",
+            window
+        )
+
+    def entries(self, window: int) -> Iterator[dict]:
+        """
+        Yields:
+            The stored entries, in traversal order.
+        """
+        columns = ", ".join(self._COLUMNS)
+        for row in self._window(
+            f"SELECT rowid, {columns} FROM entries "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            window
+        ):
+            entry = dict(zip(self._COLUMNS, row))
+            entry["is_file"] = bool(entry["is_file"])
+            yield entry
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
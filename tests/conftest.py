@@ -0,0 +1,172 @@
+import hashlib
+import json
+import posixpath
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+import pytest
+
+
+def blob_sha(data: bytes) -> str:
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def tree_sha(path: str) -> str:
+    # 目录的 sha 在测试里只需要稳定且两个列表器一致
+    return hashlib.sha1(path.encode()).hexdigest()
+
+
+class RepoServer:
+    """
+    Serves a repository over plain `http.server`:
+        GET /contents/<dir>  the contents JSON of a directory, like GitHub's
+        GET /raw/<path>      the content of a file
+        POST /graphql        a stub of GitHub's GraphQL `Tree.entries` queries
+    Requests are recorded in `requests` as (method, path),
+    the directories of each GraphQL query in `queries`.
+    `hook`, when set, is called with the path of each GET before replying,
+    e.g. to delay it; returning False answers 404.
+    """
+    _ALIAS = re.compile(r'(d\d+): object\(expression: ("(?:[^"\\]|\\.)*")\)')
+
+    def __init__(self, files: dict):
+        self.files = files
+        self.requests = []
+        self.queries = []
+        self.hook = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.requests.append(("GET", self.path))
+                if server.hook is not None and server.hook(self.path) is False:
+                    body = None
+                elif self.path.startswith("/contents/"):
+                    body = json.dumps(
+                        server.listing(unquote(self.path[len("/contents/"):]))
+                    ).encode()
+                elif self.path.startswith("/raw/"):
+                    body = server.files.get(unquote(self.path[len("/raw/"):]))
+                else:
+                    body = None
+                self.reply(body)
+
+            def do_POST(self):
+                server.requests.append(("POST", self.path))
+                query = json.loads(
+                    self.rfile.read(int(self.headers["Content-Length"]))
+                )["query"]
+                self.reply(json.dumps(server.graphql(query)).encode())
+
+            def reply(self, body):
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.handler = Handler
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    @property
+    def directories(self) -> set:
+        directories = {""}
+        for path in self.files:
+            while path := posixpath.dirname(path):
+                directories.add(path)
+        return directories
+
+    def children(self, directory: str) -> list:
+        """
+        Returns:
+            Sorted (name, path, is_file) of the direct children of `directory`.
+        """
+        children = set()
+        for path in list(self.files) + list(self.directories):
+            if path and posixpath.dirname(path) == directory:
+                children.add((posixpath.basename(path), path, path in self.files))
+        return sorted(children)
+
+    def listing(self, directory: str) -> list:
+        return [
+            {
+                "name"        : name,
+                "path"        : path,
+                "html_url"    : f"{self.url}/html/{path}",
+                "url"         : f"{self.url}/contents/{path}",
+                "download_url": f"{self.url}/raw/{path}" if is_file else None,
+                "type"        : "file" if is_file else "dir",
+                "sha"         : blob_sha(self.files[path]) if is_file else tree_sha(path),
+                "size"        : len(self.files[path]) if is_file else 0
+            }
+            for name, path, is_file in self.children(directory)
+        ]
+
+    def tree_entries(self, directory: str, depth: int) -> list:
+        entries = []
+        for name, path, is_file in self.children(directory):
+            if is_file:
+                entries.append({
+                    "name": name, "path": path, "type": "blob",
+                    "oid": blob_sha(self.files[path]),
+                    "object": {"byteSize": len(self.files[path])}
+                })
+                continue
+            entries.append({
+                "name": name, "path": path, "type": "tree",
+                "oid": tree_sha(path),
+                "object": {"entries": self.tree_entries(path, depth - 1)}
+                if depth > 1 else {}
+            })
+        return entries
+
+    def graphql(self, query: str) -> dict:
+        aliases = [
+            (alias, json.loads(expression).split(":", 1)[1])
+            for alias, expression in self._ALIAS.findall(query)
+        ]
+        self.queries.append([path for _, path in aliases])
+        depth = query.count("entries {") // len(aliases)
+        return {
+            "data": {
+                "repository": {
+                    alias: {"entries": self.tree_entries(path, depth)}
+                    if path in self.directories else None
+                    for alias, path in aliases
+                }
+            }
+        }
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def home(tmp_path, monkeypatch):
+    # Configer 会在 ~ 下写配置文件
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path / "home"))
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(files: dict) -> RepoServer:
+        servers.append(RepoServer(files))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
@@ -0,0 +1,90 @@
+import pytest
+
+from gitree import GiTree
+
+# 6 层深, 3 个分支: 根 -> a*/b/c/d/e/f.txt
+FILES = {"top.txt": b"top\n"}
+for branch in range(3):
+    FILES[f"a{branch}/b/c/d/e/f.txt"] = b"leaf %d\n" % branch
+    FILES[f"a{branch}/b/mid.txt"] = b"mid %d\n" % branch
+KEYS = ("name", "path", "download_url", "is_file", "original_sha", "size")
+
+
+def graphql_tree(server, tmp_path, **kwargs) -> GiTree:
+    return GiTree(
+        "owner", "repo",
+        save_path=str(tmp_path / "out"),
+        lister="graphql",
+        graphql_url=f"{server.url}/graphql",
+        raw_url=f"{server.url}/raw",
+        **kwargs
+    )
+
+
+def test_graphql_batches_frontier(serve, tmp_path):
+    server = serve(FILES)
+    downloader = graphql_tree(server, tmp_path, graphql_depth=2)
+    downloader._loop()
+
+    # 6 层 / 每次 2 层 = 3 次请求, 第二次起批量请求上一次未展开的目录
+    assert server.queries == [
+        [""],
+        ["a0/b", "a1/b", "a2/b"],
+        ["a0/b/c/d", "a1/b/c/d", "a2/b/c/d"],
+    ]
+    assert sorted(downloader.files) == sorted(FILES)
+
+
+def test_graphql_batch_size(serve, tmp_path):
+    server = serve(FILES)
+    downloader = graphql_tree(server, tmp_path, graphql_depth=2, graphql_batch=2)
+    downloader._loop()
+
+    # 待列目录按先进先出分批, 批次可以跨层
+    assert [len(paths) for paths in server.queries] == [1, 2, 2, 2]
+    assert all(len(paths) <= 2 for paths in server.queries)
+    assert sorted(downloader.files) == sorted(FILES)
+
+
+@pytest.mark.parametrize("depth", [1, 3, 10])
+def test_graphql_matches_rest(serve, tmp_path, depth):
+    server = serve(FILES)
+    rest = GiTree(
+        "owner", "repo",
+        save_path=str(tmp_path / "rest"),
+        base_url=f"{server.url}/contents/"
+    )
+    rest._loop()
+    rest_requests = len(server.requests)
+    graphql = graphql_tree(server, tmp_path, graphql_depth=depth)
+    graphql._loop()
+
+    assert graphql.files == rest.files
+    assert sorted(
+        tuple(element[key] for key in KEYS) for element in graphql.meta
+    ) == sorted(
+        tuple(element[key] for key in KEYS) for element in rest.meta
+    )
+    assert len(server.queries) == -(-6 // depth)
+    assert rest_requests == len(server.directories)
+
+
+def test_graphql_gets_downloads_from_raw_url(serve, tmp_path):
+    server = serve(FILES)
+    downloader = graphql_tree(server, tmp_path)
+    downloader.gets()
+
+    for path, data in FILES.items():
+        assert (tmp_path / "out" / "repo" / "main" / path).read_bytes() == data
+
+
+def test_graphql_requires_token_for_github(tmp_path):
+    with pytest.raises(ValueError):
+        GiTree("owner", "repo", save_path=str(tmp_path), lister="graphql")
+    GiTree("owner", "repo", save_path=str(tmp_path), lister="graphql", token="t")
+
+
+@pytest.mark.parametrize("kwargs", [{"graphql_depth": "2"}, {"graphql_batch": 1.5}])
+def test_graphql_options_must_be_integers(tmp_path, kwargs):
+    with pytest.raises(TypeError):
+        GiTree("owner", "repo", save_path=str(tmp_path), token="t", **kwargs)
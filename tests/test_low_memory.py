@@ -0,0 +1,34 @@
+import json
+import os
+
+import pytest
+
+from gitree import GiTree
+
+FILES = {f"d{i % 4}/s{i % 2}/f{i}.txt": b"%d\n" % i for i in range(10)}
+FILES["top.txt"] = b"top\n"
+
+
+def metadata_bytes(server, save_path, **kwargs) -> bytes:
+    downloader = GiTree(
+        "owner", "repo",
+        save_path=str(save_path),
+        base_url=f"{server.url}/contents/",
+        **kwargs
+    )
+    downloader.gets()
+    with open(os.path.join(downloader.save_dir, "GiTreeMeta.json"), "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("window", [1, 2, 7])
+@pytest.mark.parametrize("files", [FILES, {}], ids=["repo", "empty"])
+def test_low_memory_metadata_matches_normal_mode(serve, tmp_path, files, window):
+    server = serve(files)
+    expected = metadata_bytes(server, tmp_path / "normal")
+    # 窗口小于条目数, 元数据分多次从索引读出
+    assert not files or window < len(json.loads(expected))
+
+    assert metadata_bytes(
+        server, tmp_path / "low", low_memory=True, window=window
+    ) == expected
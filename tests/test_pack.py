@@ -0,0 +1,83 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from gitree import GiTree, GiTreePack
+
+FILES = {
+    "README.md"          : b"# demo\n",
+    "src/main.py"        : b"print('hi')\n",
+    "src/pkg/__init__.py": b"",
+    "src/pkg/util.py"    : b"def f():\n    return 1\n" * 50,
+    "docs/a b.txt"       : "unicode é\n".encode(),
+}
+
+
+def git_write_tree(files: dict, workdir) -> str:
+    for path, data in files.items():
+        target = workdir / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+    git = ["git", "-C", str(workdir)]
+    subprocess.run(["git", "init", "-q", str(workdir)], check=True)
+    subprocess.run(git + ["add", "-A"], check=True)
+    return subprocess.run(
+        git + ["write-tree"], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def pack_gets(server, save_path, **kwargs) -> GiTree:
+    downloader = GiTree(
+        "owner", "repo",
+        save_path=str(save_path),
+        base_url=f"{server.url}/contents/",
+        output="pack",
+        **kwargs
+    )
+    downloader.gets()
+    return downloader
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"low_memory": True}, {"when_to_thread": 1}])
+def test_pack_output_reads_back_files(serve, tmp_path, kwargs):
+    server = serve(FILES)
+    downloader = pack_gets(server, tmp_path / "out", **kwargs)
+
+    pack = GiTreePack(downloader.save_dir)
+    try:
+        for path, data in FILES.items():
+            assert pack.read(path) == data
+        assert set(FILES) <= set(pack.paths())
+    finally:
+        pack.close()
+    assert not os.path.exists(os.path.join(downloader.save_dir, "README.md"))
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+def test_pack_root_tree_matches_git(serve, tmp_path):
+    server = serve(FILES)
+    downloader = pack_gets(server, tmp_path / "out")
+
+    pack = GiTreePack(downloader.save_dir)
+    try:
+        assert pack.resolve("") == git_write_tree(FILES, tmp_path / "git")
+    finally:
+        pack.close()
+
+
+def test_pack_resync_skips_known_blobs(serve, tmp_path):
+    server = serve(FILES)
+    downloader = pack_gets(server, tmp_path / "out")
+    pack_size = os.path.getsize(os.path.join(downloader.save_dir, GiTreePack.PACK_NAME))
+
+    server.requests.clear()
+    server.files = dict(FILES, **{"new.txt": b"new\n"})
+    pack_gets(server, tmp_path / "out")
+
+    raw = [path for method, path in server.requests if path.startswith("/raw/")]
+    assert raw == ["/raw/new.txt"]
+    assert os.path.getsize(
+        os.path.join(downloader.save_dir, GiTreePack.PACK_NAME)
+    ) > pack_size
@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from gitree import GiTree, GiTreePack
+from gitree.lock import _FileLock
+from test_pack import git_write_tree
+
+FILES = {f"d{i % 3}/f{i}.txt": b"data %d\n" % i for i in range(12)}
+FILES["gone.txt"] = b"soon removed\n"
+
+# 在独立进程中运行, 以真正测试跨进程的文件锁与 SQLite
+CHILD = """
+import json, sys
+from gitree import GiTree
+GiTree(
+    "owner", "repo",
+    save_path=sys.argv[1],
+    base_url=sys.argv[2],
+    shared=True,
+    **json.loads(sys.argv[3])
+).gets()
+"""
+
+
+def shared_gets(server, save_path, **kwargs) -> GiTree:
+    downloader = GiTree(
+        "owner", "repo",
+        save_path=str(save_path),
+        base_url=f"{server.url}/contents/",
+        shared=True,
+        **kwargs
+    )
+    downloader.gets()
+    return downloader
+
+
+def metadata_paths(downloader) -> set:
+    with open(os.path.join(downloader.save_dir, "GiTreeMeta.json"), encoding="utf-8") as f:
+        return {element["path"] for element in json.load(f)}
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"low_memory": True}])
+def test_relisting_drops_removed_entries(serve, tmp_path, kwargs):
+    server = serve(dict(FILES))
+    shared_gets(server, tmp_path / "out", listing_ttl=0, **kwargs)
+    del server.files["gone.txt"]
+    downloader = shared_gets(server, tmp_path / "out", listing_ttl=0, **kwargs)
+
+    assert "gone.txt" not in metadata_paths(downloader)
+    assert "d0/f0.txt" in metadata_paths(downloader)
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"low_memory": True}])
+def test_listing_ttl_counts_from_the_listing(serve, tmp_path, kwargs):
+    server = serve(dict(FILES))
+    start = time.monotonic()
+    shared_gets(server, tmp_path / "out", listing_ttl=2, **kwargs)
+    time.sleep(max(0, start + 1.5 - time.monotonic()))
+    shared_gets(server, tmp_path / "out", listing_ttl=2, **kwargs)
+    del server.files["gone.txt"]
+    server.requests.clear()
+    time.sleep(max(0, start + 3 - time.monotonic()))
+    downloader = shared_gets(server, tmp_path / "out", listing_ttl=2, **kwargs)
+
+    assert ("GET", "/contents/") in server.requests
+    assert "gone.txt" not in metadata_paths(downloader)
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+@pytest.mark.parametrize("kwargs", [{}, {"low_memory": True}])
+def test_relisting_drops_removed_pack_paths(serve, tmp_path, kwargs):
+    server = serve(dict(FILES))
+    shared_gets(server, tmp_path / "out", listing_ttl=0, output="pack", **kwargs)
+    del server.files["gone.txt"]
+    downloader = shared_gets(server, tmp_path / "out", listing_ttl=0, output="pack", **kwargs)
+
+    pack = GiTreePack(downloader.save_dir)
+    try:
+        assert "gone.txt" not in set(pack.paths())
+        assert pack.resolve("") == git_write_tree(server.files, tmp_path / "git")
+    finally:
+        pack.close()
+    assert os.path.isfile(os.path.join(downloader.save_dir, ".gitree", "pack.lock"))
+    assert not os.path.exists(downloader.save_dir + "/GiTree.pack.lock")
+
+
+def test_relisting_waits_for_runs_binding_paths(serve, tmp_path):
+    server = serve(dict(FILES))
+    downloader = shared_gets(server, tmp_path / "out", listing_ttl=0, output="pack")
+    del server.files["gone.txt"]
+
+    # 模拟仍在绑定上一次列表路径的运行
+    in_flight = _FileLock(
+        os.path.join(downloader.save_dir, ".gitree", "paths.lock"), shared=True
+    ).acquire()
+    run = threading.Thread(
+        target=shared_gets,
+        args=(server, tmp_path / "out"),
+        kwargs={"listing_ttl": 0, "output": "pack"}
+    )
+    run.start()
+    run.join(1)
+    pack = GiTreePack(downloader.save_dir)
+    try:
+        assert run.is_alive()
+        assert "gone.txt" in set(pack.paths())
+        in_flight.release()
+        run.join()
+        assert "gone.txt" not in set(pack.paths())
+    finally:
+        pack.close()
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"low_memory": True}, {"output": "pack"}])
+def test_concurrent_runs_share_work(serve, tmp_path, kwargs):
+    server = serve(FILES)
+    runs = [
+        subprocess.Popen([
+            sys.executable, "-c", CHILD,
+            str(tmp_path / "out"), f"{server.url}/contents/", json.dumps(kwargs)
+        ], stdout=subprocess.DEVNULL)
+        for _ in range(4)
+    ]
+    assert [run.wait(60) for run in runs] == [0] * 4
+
+    raw = [path for method, path in server.requests if path.startswith("/raw/")]
+    listings = [path for method, path in server.requests if path.startswith("/contents/")]
+    assert sorted(raw) == sorted(f"/raw/{path}" for path in FILES)
+    assert len(listings) == 4
+    save_dir = os.path.join(tmp_path, "out", "repo", "main")
+    if kwargs.get("output") == "pack":
+        pack = GiTreePack(save_dir)
+        try:
+            for path, data in FILES.items():
+                assert pack.read(path) == data
+        finally:
+            pack.close()
+    else:
+        for path, data in FILES.items():
+            with open(os.path.join(save_dir, path), "rb") as f:
+                assert f.read() == data
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import deque
+
+import pytest
+
+from gitree import GiTree
+
+# 一层 12 个目录, 每个目录下两个文件和一个子目录
+FILES = {"top.txt": b"top\n"}
+for i in range(12):
+    FILES[f"d{i:02}/a.txt"] = b"a %d\n" % i
+    FILES[f"d{i:02}/b.txt"] = b"b %d\n" % i
+    FILES[f"d{i:02}/sub/c.txt"] = b"c %d\n" % i
+
+
+def stream_downloader(server, save_path, **kwargs) -> GiTree:
+    return GiTree(
+        "owner", "repo",
+        save_path=str(save_path),
+        base_url=f"{server.url}/contents/",
+        stream=True,
+        **kwargs
+    )
+
+
+def run_within(target, timeout: float = 30):
+    """
+    Runs `target` in a thread.
+
+    Returns:
+        The exception raised by `target`, or None.
+    """
+    raised = []
+
+    def run():
+        try:
+            target()
+        except Exception as e:
+            raised.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "hung"
+    return raised[0] if raised else None
+
+
+def bfs_listings(server) -> list:
+    expected = []
+    pending = deque([""])
+    while pending:
+        listing = server.listing(pending.popleft())
+        expected.append([entry["path"] for entry in listing])
+        pending.extend(entry["path"] for entry in listing if entry["type"] == "dir")
+    return expected
+
+
+def raw_paths(server) -> list:
+    return sorted(path for method, path in server.requests if path.startswith("/raw/"))
+
+
+def test_walk_yields_each_directory_in_bfs_order(serve, tmp_path):
+    server = serve(FILES)
+    walk = stream_downloader(server, tmp_path / "out").walk()
+
+    for listing in bfs_listings(server):
+        before = len(server.requests)
+        assert [next(walk)["path"] for _ in listing] == listing
+        # 每一步只列出一个目录
+        assert len(server.requests) == before + 1
+    assert next(walk, None) is None
+
+
+def test_stream_downloads_every_file(serve, tmp_path):
+    server = serve(FILES)
+    downloader = stream_downloader(server, tmp_path / "out")
+    downloader.gets()
+
+    assert raw_paths(server) == sorted(f"/raw/{path}" for path in FILES)
+    for path, data in FILES.items():
+        with open(os.path.join(downloader.save_dir, path), "rb") as f:
+            assert f.read() == data
+
+
+def test_stream_downloads_before_listing_ends(serve, tmp_path):
+    server = serve(FILES)
+    server.hook = lambda path: time.sleep(0.05) if path.startswith("/contents/") else None
+    stream_downloader(server, tmp_path / "out").gets()
+
+    paths = [path for method, path in server.requests]
+    first_raw = min(i for i, path in enumerate(paths) if path.startswith("/raw/"))
+    last_listing = max(i for i, path in enumerate(paths) if path.startswith("/contents/"))
+    assert first_raw < last_listing
+
+
+def test_stream_queue_bounds_the_traversal(serve, tmp_path):
+    files = {f"d{i:03}/f.txt": b"%d\n" % i for i in range(GiTree._WORKERS * 3)}
+    server = serve(files)
+    release = threading.Event()
+    server.hook = lambda path: release.wait() if path.startswith("/raw/") else None
+    downloader = stream_downloader(server, tmp_path / "out", queue_size=2)
+
+    run = threading.Thread(target=downloader.gets, daemon=True)
+    run.start()
+    time.sleep(1)
+    listings = sum(path.startswith("/contents/") for method, path in server.requests)
+    release.set()
+    run.join(30)
+
+    # 根目录, 每个工作线程一个, 队列中 queue_size 个, 生产者手中一个
+    assert listings <= 1 + GiTree._WORKERS + 2 + 1
+    assert not run.is_alive()
+    assert raw_paths(server) == sorted(f"/raw/{path}" for path in files)
+
+
+def test_stream_survives_failing_downloads(serve, tmp_path, monkeypatch):
+    server = serve(FILES)
+    server.hook = lambda path: path != "/raw/d00/a.txt"
+    downloader = stream_downloader(server, tmp_path / "out")
+    write_file = downloader._write_file
+
+    def flaky_write_file(path, url, save_to):
+        if path == "d01/a.txt":
+            raise OSError("disk full")
+        return write_file(path, url, save_to)
+
+    monkeypatch.setattr(downloader, "_write_file", flaky_write_file)
+    assert run_within(downloader.gets) is None
+
+    for path in set(FILES) - {"d00/a.txt", "d01/a.txt"}:
+        assert os.path.isfile(os.path.join(downloader.save_dir, path))
+    assert not os.path.exists(os.path.join(downloader.save_dir, "d00/a.txt"))
+
+
+def test_stream_producer_exception_releases_workers(serve, tmp_path, monkeypatch):
+    server = serve(FILES)
+    downloader = stream_downloader(server, tmp_path / "out", queue_size=1)
+    advance = downloader._advance
+    steps = []
+
+    def failing_advance(frontier):
+        steps.append(frontier)
+        if len(steps) == 3:
+            raise RuntimeError("listing failed")
+        advance(frontier)
+
+    monkeypatch.setattr(downloader, "_advance", failing_advance)
+    raised = run_within(downloader.gets)
+
+    assert isinstance(raised, RuntimeError)
+    # 异常前发现的文件仍然下载完
+    assert "/raw/top.txt" in raw_paths(server)